@@ -22,24 +22,37 @@
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-import json
+import orjson
 import asyncio
+import contextlib
 import os
 import sys
 import argparse
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 from datetime import datetime
+from utils import env_overlay
 
-# Custom JSON encoder to handle non-serializable objects
-class MCPEncoder(json.JSONEncoder):
-    def default(self, obj):
-        # Convert objects to their dict representation if possible
-        try:
-            return obj.__dict__
-        except AttributeError:
-            # If the object doesn't have __dict__, convert to string
-            return str(obj)
+# Fallback serializer for objects orjson can't handle natively
+def _mcp_default(obj):
+    # Convert objects to their dict representation if possible
+    try:
+        return obj.__dict__
+    except AttributeError:
+        # If the object doesn't have __dict__, convert to string
+        return str(obj)
+
+def _dump_nested(obj, option: int, depth: int) -> bytes:
+    """
+    Serialize an object that is embedded ``depth`` levels deep in a larger document
+    
+    orjson never emits raw newlines inside strings, so indented output can be
+    shifted right by prefixing every line break.
+    """
+    data = orjson.dumps(obj, default=_mcp_default, option=option)
+    if depth and option & orjson.OPT_INDENT_2:
+        data = data.replace(b'\n', b'\n' + b'  ' * depth)
+    return data
 
 # Configure logging
 logging.basicConfig(
@@ -58,7 +71,30 @@ OUTPUT_PATH = "config.json"
 # Connection timeout in seconds
 CONNECTION_TIMEOUT = 30
 
-async def extract_tools_from_server(server_name: str, server_config: Dict[str, Any], dry_run: bool = False) -> Dict[str, Any]:
+def _server_params(command: str, args: List[str]) -> StdioServerParameters:
+    """
+    Build the stdio parameters for a server
+    
+    Must be called with the server's environment variables applied to os.environ. The
+    environment is copied on every call, since it changes while other servers are connecting.
+    """
+    # Check if StdioServerParameters accepts env parameter
+    try:
+        return StdioServerParameters(
+            command=command,
+            args=args,
+            env=os.environ.copy()  # Pass the current environment including our set variables
+        )
+    except TypeError:
+        # If env is not a valid parameter, fall back to the original approach
+        logger.info("StdioServerParameters does not accept env parameter, using process environment")
+        return StdioServerParameters(
+            command=command,
+            args=args
+        )
+
+async def extract_tools_from_server(server_name: str, server_config: Dict[str, Any], dry_run: bool = False,
+                                    semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
     """
     Connect to an MCP server and extract its tool list
     
@@ -66,11 +102,12 @@ async def extract_tools_from_server(server_name: str, server_config: Dict[str, A
         server_name: Name of the MCP server
         server_config: Configuration for the MCP server
         dry_run: If True, don't actually connect to the server
+        semaphore: If given, held while connected to limit concurrent servers
         
     Returns:
         Dictionary containing server name and its tools
     """
-    logger.info(f"Processing server: {server_name}")
+    logger.info("Processing server: %s", server_name)
     
     command = server_config.get("command")
     args = server_config.get("args", [])
@@ -86,69 +123,60 @@ async def extract_tools_from_server(server_name: str, server_config: Dict[str, A
     }
     
     if dry_run:
-        logger.info(f"Dry run mode - skipping connection to {server_name}")
+        logger.info("Dry run mode - skipping connection to %s", server_name)
         return result
     
-    # Set environment variables before connecting to the server
-    original_env = {}
-    for key, value in env.items():
-        original_env[key] = os.environ.get(key)
-        os.environ[key] = value
-        logger.info(f"Set environment variable {key} for server {server_name}")
-    
-    try:
-        logger.info(f"Connecting to server: {server_name} with environment variables: {env}")
-        # Check if StdioServerParameters accepts env parameter
-        try:
-            server_params = StdioServerParameters(
-                command=command,
-                args=args,
-                env=os.environ.copy()  # Pass the current environment including our set variables
-            )
-        except TypeError:
-            # If env is not a valid parameter, fall back to the original approach
-            logger.info(f"StdioServerParameters does not accept env parameter, using process environment")
-            server_params = StdioServerParameters(
-                command=command,
-                args=args
-            )
+    # Wait for a free slot so only a bounded number of servers are spawned at once
+    async with semaphore if semaphore is not None else contextlib.nullcontext():
+        # Set environment variables before connecting to the server
+        if logger.isEnabledFor(logging.INFO):
+            for key in env:
+                logger.info("Set environment variable %s for server %s", key, server_name)
         
-        try:
-            # Create a timeout for the connection
-            async with asyncio.timeout(CONNECTION_TIMEOUT):
-                # Log environment variables for debugging
-                logger.info(f"Environment variables for {server_name}: {', '.join(f'{k}={v[:4]}***' for k, v in env.items())}")
-                async with stdio_client(server_params) as (read, write):
-                    logger.info(f"Connected to {server_name}, initializing session")
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
-                        logger.info(f"Session initialized for {server_name}, listing tools")
-                        tools = await session.list_tools()
-                        
-                        for tool in tools.tools:
-                            result["tools"].append({
-                                "name": tool.name,
-                                "description": tool.description,
-                                "inputSchema": tool.inputSchema,
-                                "annotations": tool.annotations,
-                            })
-                        
-                        logger.info(f"Successfully extracted {len(result['tools'])} tools from {server_name}")
-        except asyncio.TimeoutError:
-            logger.error(f"Connection to {server_name} timed out after {CONNECTION_TIMEOUT} seconds")
-        except Exception as e:
-            logger.error(f"Error connecting to {server_name}: {str(e)}")
-        
-        return result
-    
-    finally:
-        # Restore original environment variables
-        for key, value in original_env.items():
-            if value is None:
-                if key in os.environ:
-                    del os.environ[key]
-            else:
-                os.environ[key] = value
+        with env_overlay(env) if env else contextlib.nullcontext():
+            logger.info("Connecting to server: %s with environment variables: %s", server_name, env)
+            server_params = _server_params(command, args)
+            
+            try:
+                # Create a timeout for the connection
+                async with asyncio.timeout(CONNECTION_TIMEOUT):
+                    # Log environment variables for debugging
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("Environment variables for %s: %s", server_name, ', '.join(f'{k}={v[:4]}***' for k, v in env.items()))
+                    async with stdio_client(server_params) as (read, write):
+                        logger.info("Connected to %s, initializing session", server_name)
+                        async with ClientSession(read, write) as session:
+                            await session.initialize()
+                            logger.info("Session initialized for %s, listing tools", server_name)
+                            tools = await session.list_tools()
+                            
+                            result["tools"] = [
+                                {
+                                    "name": tool.name,
+                                    "description": tool.description,
+                                    "inputSchema": tool.inputSchema,
+                                    "annotations": tool.annotations,
+                                }
+                                for tool in tools.tools
+                            ]
+                            
+                            logger.info("Successfully extracted %d tools from %s", len(result['tools']), server_name)
+            except asyncio.TimeoutError:
+                logger.error("Connection to %s timed out after %s seconds", server_name, CONNECTION_TIMEOUT)
+            except Exception as e:
+                logger.error("Error connecting to %s: %s", server_name, e)
+            
+            return result
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be an integer, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 async def main():
     global CONFIG_PATH, OUTPUT_PATH, CONNECTION_TIMEOUT
@@ -160,71 +188,121 @@ async def main():
     parser.add_argument('--output', type=str, default=OUTPUT_PATH, help='Path to output file')
     parser.add_argument('--timeout', type=int, default=CONNECTION_TIMEOUT, help='Connection timeout in seconds')
     parser.add_argument('--server', type=str, help='Process only a specific server')
+    parser.add_argument('--pretty', action='store_true', help='Indent the output file for human readers')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only log warnings and errors')
+    parser.add_argument('--concurrency', type=_positive_int, help='Maximum number of servers to connect to at once (default: min(32, number of servers))')
     args = parser.parse_args()
     
+    if args.quiet:
+        logger.setLevel(logging.WARNING)
+    
     CONFIG_PATH = args.config
     OUTPUT_PATH = args.output
     CONNECTION_TIMEOUT = args.timeout
     
     # Load the config file
     try:
-        logger.info(f"Loading config file from {CONFIG_PATH}")
-        with open(CONFIG_PATH, 'r') as f:
-            config = json.load(f)
+        logger.info("Loading config file from %s", CONFIG_PATH)
+        with open(CONFIG_PATH, 'rb') as f:
+            config = orjson.loads(f.read())
     except Exception as e:
-        logger.error(f"Error loading config file: {str(e)}")
+        logger.error("Error loading config file: %s", e)
         return
     
     # Extract MCP server configurations
     mcp_servers = config.get("mcpServers", {})
-    logger.info(f"Found {len(mcp_servers)} MCP servers in config")
+    logger.info("Found %d MCP servers in config", len(mcp_servers))
     
     # Filter servers if --server argument is provided
     if args.server:
         if args.server in mcp_servers:
             mcp_servers = {args.server: mcp_servers[args.server]}
-            logger.info(f"Processing only server: {args.server}")
+            logger.info("Processing only server: %s", args.server)
         else:
-            logger.error(f"Server {args.server} not found in config")
+            logger.error("Server %s not found in config", args.server)
             return
     
     # Process each server
+    concurrency = args.concurrency
+    if concurrency is None:
+        concurrency = max(1, min(32, len(mcp_servers)))
+    semaphore = asyncio.Semaphore(concurrency)
     tasks = []
     for server_name, server_config in mcp_servers.items():
-        task = extract_tools_from_server(server_name, server_config, args.dry_run)
+        task = extract_tools_from_server(server_name, server_config, args.dry_run, semaphore)
         tasks.append(task)
     
-    # Wait for all tasks to complete
-    logger.info(f"Starting processing of {len(tasks)} servers")
-    start_time = datetime.now()
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    end_time = datetime.now()
-    
-    # Filter out exceptions
-    server_results = []
-    for result in results:
-        if isinstance(result, Exception):
-            logger.error(f"Error processing server: {str(result)}")
-        else:
-            server_results.append(result)
-    
-    # Save results to output file
-    output = {
-        "metadata": {
-            "timestamp": datetime.now().isoformat(),
-            "servers_processed": len(mcp_servers),
-            "servers_successful": len(server_results),
-            "processing_time_seconds": (end_time - start_time).total_seconds()
-        },
-        "servers": server_results
-    }
+    option = orjson.OPT_NON_STR_KEYS
+    if args.pretty:
+        option |= orjson.OPT_INDENT_2
     
-    logger.info(f"Writing results to {OUTPUT_PATH}")
-    with open(OUTPUT_PATH, 'w') as f:
-        json.dump(output, f, indent=2, cls=MCPEncoder)
+    # Stream each server result to a temporary file as soon as it completes, so
+    # finished servers don't wait in memory for the slowest one. Metadata is only
+    # known at the end and is written after the server list.
+    logger.info("Writing results to %s", OUTPUT_PATH)
+    tmp_path = OUTPUT_PATH + ".tmp"
+    servers_successful = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(b'{\n  "servers": [' if args.pretty else b'{"servers":[')
+            
+            # Wait for each task to complete
+            logger.info("Starting processing of %d servers", len(tasks))
+            start_time = datetime.now()
+            # A dry run never waits on a server, so keep config order there
+            pending = tasks if args.dry_run else asyncio.as_completed(tasks)
+            for next_result in pending:
+                try:
+                    result = await next_result
+                except Exception as e:
+                    logger.error("Error processing server: %s", e)
+                    continue
+                
+                if servers_successful:
+                    f.write(b',')
+                if args.pretty:
+                    f.write(b'\n    ')
+                f.write(_dump_nested(result, option, 2 if args.pretty else 0))
+                servers_successful += 1
+            end_time = datetime.now()
+            
+            metadata = {
+                "timestamp": datetime.now().isoformat(),
+                "servers_processed": len(mcp_servers),
+                "servers_successful": servers_successful,
+                "processing_time_seconds": (end_time - start_time).total_seconds()
+            }
+            if args.pretty:
+                if servers_successful:
+                    f.write(b'\n  ')
+                f.write(b'],\n  "metadata": ')
+                f.write(_dump_nested(metadata, option, 1))
+                f.write(b'\n}')
+            else:
+                f.write(b'],"metadata":')
+                f.write(_dump_nested(metadata, option, 0))
+                f.write(b'}')
+        os.replace(tmp_path, OUTPUT_PATH)
+    except BaseException:
+        # Don't leave a half-written file behind on errors or Ctrl-C
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
     
-    logger.info(f"Successfully saved tool lists to {OUTPUT_PATH}")
-    logger.info(f"Processed {len(server_results)}/{len(mcp_servers)} servers successfully")
+    logger.info("Successfully saved tool lists to %s", OUTPUT_PATH)
+    logger.info("Processed %d/%d servers successfully", servers_successful, len(mcp_servers))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is an optional speed-up for the subprocess/stdio heavy event loop
+    uvloop = None
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+        except ImportError:
+            pass
+    
+    # uvloop.run() only exists in uvloop >= 0.18, older releases fall back to asyncio
+    if uvloop is not None and hasattr(uvloop, "run"):
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -24,21 +24,38 @@ Extract tool names from MCP server config and create a flattened list.
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import json
+import orjson
 import argparse
+import contextlib
 import csv
-import os
-from typing import List, Dict, Any, Tuple, NamedTuple, Optional
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, Optional
+from utils import env_overlay
 
 
-class ToolInfo(NamedTuple):
-    """Information about a tool."""
-    server_name: str
-    tool_name: str
-    description: str
+# Characters that make csv.writer quote a field
+_CSV_SPECIAL_CHARS = re.compile(r'[,"\r\n]')
 
 
-def extract_server_tools(config_path: str, set_env_vars: bool = True) -> List[ToolInfo]:
+@dataclass
+class ServerTools:
+    """Server names, tool names and descriptions stored as parallel columns."""
+    server_names: List[str] = field(default_factory=list)
+    tool_names: List[str] = field(default_factory=list)
+    descriptions: List[str] = field(default_factory=list)
+    
+    def append(self, server_name: str, tool_name: str, description: str) -> None:
+        """Add one server-tool pair."""
+        self.server_names.append(server_name)
+        self.tool_names.append(tool_name)
+        self.descriptions.append(description)
+    
+    def __len__(self) -> int:
+        return len(self.tool_names)
+
+
+def extract_server_tools(config_path: str, set_env_vars: bool = True) -> ServerTools:
     """
     Extract server names, tool names, and descriptions from the config file.
     
@@ -47,96 +64,96 @@ def extract_server_tools(config_path: str, set_env_vars: bool = True) -> List[To
         set_env_vars: If True, set environment variables from the config
         
     Returns:
-        List of ToolInfo objects containing server_name, tool_name, and description
+        ServerTools holding the server_name, tool_name, and description columns
     """
     # Read the config file
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    with open(config_path, 'rb') as f:
+        config = orjson.loads(f.read())
     
     # Extract server and tool information
-    server_tools = []
+    server_tools = ServerTools()
     
-    # Store original environment variables to restore later
-    original_env = {}
-    
-    try:
+    # Environment overlays are restored once all servers have been processed
+    with contextlib.ExitStack() as env_stack:
         # Check if this is the original config file or our processed file
         if "mcpServers" in config:
             # Original config file format
             for server_name, server_config in config.get("mcpServers", {}).items():
                 # Set environment variables if requested
-                if set_env_vars and "env" in server_config:
-                    for key, value in server_config.get("env", {}).items():
-                        original_env[key] = os.environ.get(key)
-                        os.environ[key] = value
+                if set_env_vars and server_config.get("env"):
+                    env = server_config["env"]
+                    env_stack.enter_context(env_overlay(env))
+                    for key, value in env.items():
                         print(f"Set environment variable: {key}={value}")
                 
                 # We don't have tool information in the original config
                 # Just add the server name with an empty tool name and description
-                server_tools.append(ToolInfo(server_name, "", ""))
+                server_tools.append(server_name, "", "")
         else:
             # Our processed config file format
             for server in config.get("servers", []):
                 server_name = server.get("server_name", "unknown")
                 
                 # Set environment variables if requested
-                if set_env_vars and "env" in server:
-                    for key, value in server.get("env", {}).items():
-                        original_env[key] = os.environ.get(key)
-                        os.environ[key] = value
+                if set_env_vars and server.get("env"):
+                    env = server["env"]
+                    env_stack.enter_context(env_overlay(env))
+                    for key, value in env.items():
                         print(f"Set environment variable: {key}={value}")
                 
                 for tool in server.get("tools", []):
                     tool_name = tool.get("name", "unknown")
                     description = tool.get("description", "")
-                    server_tools.append(ToolInfo(server_name, tool_name, description))
+                    server_tools.append(server_name, tool_name, description)
         
         return server_tools
-    
-    finally:
-        # Restore original environment variables
-        if set_env_vars:
-            for key, value in original_env.items():
-                if value is None:
-                    if key in os.environ:
-                        del os.environ[key]
-                else:
-                    os.environ[key] = value
 
 
-def save_as_csv(server_tools: List[ToolInfo], output_path: str) -> None:
+def save_as_csv(server_tools: ServerTools, output_path: str) -> None:
     """
     Save the server names, tool names, and descriptions as a CSV file.
     
     Args:
-        server_tools: List of ToolInfo objects
+        server_tools: ServerTools columns to write
         output_path: Path to save the CSV file
     """
+    columns = (server_tools.server_names, server_tools.tool_names, server_tools.descriptions)
+    
     with open(output_path, 'w', newline='') as f:
+        # Fast path: when no field needs quoting, build the whole file as one string.
+        # The line terminator matches csv.writer's default so both paths produce identical output.
+        if all(isinstance(value, str) and not _CSV_SPECIAL_CHARS.search(value) for column in columns for value in column):
+            rows = [f"{server_name},{tool_name},{description}\r\n" for server_name, tool_name, description in zip(*columns)]
+            f.write("server_name,tool_name,description\r\n" + "".join(rows))
+            return
+        
         writer = csv.writer(f)
         writer.writerow(["server_name", "tool_name", "description"])
-        writer.writerows([(tool.server_name, tool.tool_name, tool.description) for tool in server_tools])
+        writer.writerows(zip(*columns))
 
 
-def save_as_json(server_tools: List[ToolInfo], output_path: str, reporter_format: bool = False) -> None:
+def save_as_json(server_tools: ServerTools, output_path: str, reporter_format: bool = False, pretty: bool = False) -> None:
     """
     Save the server names, tool names, and descriptions as a JSON file.
     
     Args:
-        server_tools: List of ToolInfo objects
+        server_tools: ServerTools columns to write
         output_path: Path to save the JSON file
         reporter_format: If True, format the output for the reporter.py script
+        pretty: If True, indent the output for human readers
     """
     if reporter_format:
         # Format for reporter.py: {"tools": [{"name": "tool_name", "description": "actual description"}, ...]}
-        tools = [{"name": tool.tool_name, "description": tool.description or f"Server: {tool.server_name}"} for tool in server_tools]
+        tools = [{"name": tool_name, "description": description or f"Server: {server_name}"}
+                 for server_name, tool_name, description in zip(server_tools.server_names, server_tools.tool_names, server_tools.descriptions)]
         output = {"tools": tools}
     else:
         # Original format: [{"server_name": "server", "tool_name": "tool", "description": "desc"}, ...]
-        output = [{"server_name": tool.server_name, "tool_name": tool.tool_name, "description": tool.description} for tool in server_tools]
+        output = [{"server_name": server_name, "tool_name": tool_name, "description": description}
+                  for server_name, tool_name, description in zip(server_tools.server_names, server_tools.tool_names, server_tools.descriptions)]
     
-    with open(output_path, 'w') as f:
-        json.dump(output, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 if pretty else None))
 
 
 def main():
@@ -150,6 +167,8 @@ def main():
                         help='Output format (default: json, reporter for reporter.py compatibility)')
     parser.add_argument('--no-env', action='store_true',
                         help='Do not set environment variables from the config')
+    parser.add_argument('--pretty', action='store_true',
+                        help='Indent JSON output for human readers')
     args = parser.parse_args()
     
     # Extract server and tool names
@@ -159,9 +178,9 @@ def main():
     if args.format == 'csv':
         save_as_csv(server_tools, args.output)
     elif args.format == 'reporter':
-        save_as_json(server_tools, args.output, reporter_format=True)
+        save_as_json(server_tools, args.output, reporter_format=True, pretty=args.pretty)
     else:
-        save_as_json(server_tools, args.output)
+        save_as_json(server_tools, args.output, pretty=args.pretty)
     
     print(f"Extracted {len(server_tools)} server-tool pairs to {args.output}")
 
@@ -1,75 +1,42 @@
-import json
-from typing import List, Optional
-from pydantic import BaseModel
+import orjson
 from agents import Agent, Runner
+from reporter_models import SYSTEM_PROMPT, StructuredAnalysis, build_user_prompt, expand_analysis, prompt_fingerprint
+from utils import condense_tools, read_report_cache, report_cache_path, write_report_cache
+
+USER_PROMPT_INTRO = "Analyse this tool declarations:"
+# Cached analyses are only reused while the prompt and output schema stay the same
+CACHE_FINGERPRINT = prompt_fingerprint(
+    USER_PROMPT_INTRO,
+    orjson.dumps(StructuredAnalysis.model_json_schema(), option=orjson.OPT_SORT_KEYS).decode("utf-8"),
+)
 
 
 # === Load tools.json ===
-with open("reporter_tools.json", "r") as f:
-    tools = json.load(f).get("tools", [])
-
-
-# === Define output structure ===
-class PredictedPrecedence(BaseModel):
-    tools: List[str]
-    likely_selection: str
-    reason: str
-    conflicting_tools: List[str]
-
-class OverlappingFunctionality(BaseModel):
-    description: str
-    predicted_precedence: List[PredictedPrecedence]
-
-class IssueCategory(BaseModel):
-    description: str
-    affected_tools: List[str]
-
-class Recommendations(BaseModel):
-    suggestions: List[str]
+with open("reporter_tools.json", "rb") as f:
+    tools = orjson.loads(f.read()).get("tools", [])
 
-class StructuredAnalysis(BaseModel):
-    overlapping_functionality: OverlappingFunctionality
-    influencing_or_persuasive_language: IssueCategory
-    crafted_or_informal_tone: IssueCategory
-    attention_seeking_wording: IssueCategory
-    inconsistency_in_tone_or_structure: IssueCategory
-    recommendations: Recommendations
 
+# === Construct prompt input, sending identical descriptions only once ===
+condensed_tools, aliases = condense_tools(tools)
+user_prompt = build_user_prompt(USER_PROMPT_INTRO, condensed_tools, aliases)
 
-# === Prompt ===
-system_prompt = """
-You are given a JSON blob where each object contains a tool name and its description.
 
-These tools are available to an AI agent that selects one or more tools to solve user queries.
-
-Your task is to analyze the tool descriptions and identify any of the following issues that could cause biased or incorrect tool selection by the LLM:
-
-1. Overlapping functionality — tools that perform similar actions and may confuse the model
-2. Influencing or persuasive language — descriptions that subtly suggest preference or priority
-3. Crafted or informal tone — non-neutral wording such as second-person instructions or emotional framing
-4. Attention-seeking wording — descriptions using exaggeration or marketing-style language (e.g. "better", "use this if...")
-5. Predicted precedence — for each overlapping tool group, predict which tool the LLM would likely select and explain why (e.g. due to tone, specificity, keyword match)
-6. Inconsistency in tone or structure — descriptions that don’t follow a consistent, formal, objective style
-
-The goal is to prevent the LLM from taking unintended or suboptimal actions due to description bias.
-Provide a structured and reasoned analysis, grouped by issue type. Include recommendations where appropriate.
-Pay attention to Predicted precedence, as it is crucial for understanding how the LLM might prioritize tools.
-Identitfy which tools are most likely to be selected based on the descriptions provided if they are similar in nature
-The analysis should be clear and concise, with a focus on the potential impact of each issue on the LLM's decision-making process.
-"""
-
-# === Construct prompt input ===
-user_prompt = "Analyse this tool declarations:\n\n" + json.dumps(tools, indent=2)
-
-# === Setup Agent ===
-agent = Agent(
-    name="Structured Analysis Agent",
-    instructions=system_prompt,
-    output_type=StructuredAnalysis
-)
+# === Reuse the analysis from a previous run on the same tools ===
+cache_path = report_cache_path("new_reporter", tools, CACHE_FINGERPRINT)
+report = read_report_cache(cache_path)
+if report is None:
+    # === Setup Agent ===
+    agent = Agent(
+        name="Structured Analysis Agent",
+        instructions=SYSTEM_PROMPT,
+        output_type=StructuredAnalysis
+    )
 
-# === Run the Agent ===
-result = Runner.run_sync(agent, user_prompt)
+    # === Run the Agent ===
+    result = Runner.run_sync(agent, user_prompt)
+    analysis = expand_analysis(result.final_output, aliases)
+    report = analysis.model_dump_json(indent=2)
+    write_report_cache(cache_path, report)
 
 # === Print structured result as JSON ===
-print(json.dumps(result.final_output.model_dump(), indent=2, ensure_ascii=False))
\ No newline at end of file
+print(report)
\ No newline at end of file
@@ -20,14 +20,18 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import json
+import orjson
 import os
 import sys
 from pathlib import Path
 from openai import OpenAI
+from reporter_models import SYSTEM_PROMPT, build_user_prompt, prompt_fingerprint
+from utils import condense_tools, read_report_cache, report_cache_path, write_report_cache
 
-# Initialize the OpenAI client (it will use the OPENAI_API_KEY environment variable by default)
-client = OpenAI()
+MODEL = "gpt-4o"
+USER_PROMPT_INTRO = "Here is a list of tool declarations:"
+# Cached reports are only reused while the prompt and model stay the same
+CACHE_FINGERPRINT = prompt_fingerprint(MODEL, USER_PROMPT_INTRO)
 
 # Get the filename from command-line arguments
 json_file = sys.argv[1]
@@ -35,12 +39,12 @@ json_file = sys.argv[1]
 
 # Load the tools.json file
 try:
-    with open(json_file, "r") as f:
-        data = json.load(f)
+    with open(json_file, "rb") as f:
+        data = orjson.loads(f.read())
 except FileNotFoundError:
     print(f"Error: File '{json_file}' not found")
     sys.exit(1)
-except json.JSONDecodeError:
+except orjson.JSONDecodeError:
     print(f"Error: File '{json_file}' is not valid JSON")
     sys.exit(1)
 
@@ -49,9 +53,9 @@ except json.JSONDecodeError:
 if isinstance(data, list):
     # If data is a list, use it directly as the tools list
     tools = data
-    # Convert to expected format with name and description
+    # Convert extract_tools.py output (server_name/tool_name/description) to name and description
     if len(tools) > 0 and "tool_name" in tools[0]:
-        tools = [{"name": tool.get("tool_name", ""), "description": tool.get("description", "")} for tool in tools]
+        tools = [{"name": tool.get("tool_name", ""), "description": tool.get("description") or ""} for tool in data]
 elif isinstance(data, dict) and "tools" in data:
     # If data is a dict with a "tools" key, use that
     tools = data.get("tools", [])
@@ -60,41 +64,39 @@ else:
     tools = []
     print("Warning: No tools found in the JSON file. Expected a list or a dict with a 'tools' key.")
 
-# System prompt that sets up the security audit agent
-system_prompt = """
-You are given a JSON blob where each object contains a tool name and its description.
 
-These tools are available to an AI agent that selects one or more tools to solve user queries.
-
-Your task is to analyze the tool descriptions and identify any of the following issues that could cause biased or incorrect tool selection by the LLM:
-
-1. Overlapping functionality — tools that perform similar actions and may confuse the model
-2. Influencing or persuasive language — descriptions that subtly suggest preference or priority
-3. Crafted or informal tone — non-neutral wording such as second-person instructions or emotional framing
-4. Attention-seeking wording — descriptions using exaggeration or marketing-style language (e.g. "better", "use this if...")
-5. Predicted precedence — for each overlapping tool group, predict which tool the LLM would likely select and explain why (e.g. due to tone, specificity, keyword match)
-6. Inconsistency in tone or structure — descriptions that don’t follow a consistent, formal, objective style
-
-The goal is to prevent the LLM from taking unintended or suboptimal actions due to description bias.
-Provide a structured and reasoned analysis, grouped by issue type. Include recommendations where appropriate.
-Pay attention to Predicted precedence, as it is crucial for understanding how the LLM might prioritize tools.
-Identitfy which tools are most likely to be selected based on the descriptions provided if they are similar in nature
-The analysis should be clear and concise, with a focus on the potential impact of each issue on the LLM's decision-making process.
-"""
+# Send tools with identical descriptions only once to keep the prompt short
+condensed_tools, aliases = condense_tools(tools)
 
 # Prepare the user message with tool data as a list
-user_prompt = "Here is a list of tool declarations:\n\n" + json.dumps(tools, indent=2)
+user_prompt = build_user_prompt(USER_PROMPT_INTRO, condensed_tools, aliases)
 
-# Run OpenAI API call
-response = client.chat.completions.create(
-    model="gpt-4o",  # or gpt-4o if you have access
-    messages=[
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt}
-    ],
-    temperature=0
-)
+# Reuse the report from a previous run on the same tools
+cache_path = report_cache_path("reporter", tools, CACHE_FINGERPRINT, suffix=".md")
+report = read_report_cache(cache_path)
+if report is None:
+    # Initialize the OpenAI client (it will use the OPENAI_API_KEY environment variable by default)
+    client = OpenAI()
+
+    # Run OpenAI API call
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0
+    )
+    report = response.choices[0].message.content
+    if report is not None:
+        write_report_cache(cache_path, report)
 
 # Display result
 print("\n📋 Tool Security Audit Report:\n")
-print(response.choices[0].message.content)
\ No newline at end of file
+print(report)
+
+# List the tools that were folded into another tool's entry
+if aliases:
+    print("\nTools with identical descriptions (analysed as one):\n")
+    for name, names in aliases.items():
+        print(f"- {name}: {', '.join(names)}")
\ No newline at end of file
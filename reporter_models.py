@@ -0,0 +1,136 @@
+"""
+Output models and system prompt shared by the MCP tool description reporters.
+"""
+# Copyright (c) 2025 kubiosec-ai
+#
+# This file is part of MCP Server Tool Analyzer.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import hashlib
+import orjson
+import sys
+import textwrap
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from utils import expand_aliases
+
+
+# === Prompt ===
+# The prompt never changes, so it is built and interned once at import time
+SYSTEM_PROMPT = sys.intern(textwrap.dedent("""
+You are given a JSON blob where each object contains a tool name and its description.
+
+These tools are available to an AI agent that selects one or more tools to solve user queries.
+
+Your task is to analyze the tool descriptions and identify any of the following issues that could cause biased or incorrect tool selection by the LLM:
+
+1. Overlapping functionality — tools that perform similar actions and may confuse the model
+2. Influencing or persuasive language — descriptions that subtly suggest preference or priority
+3. Crafted or informal tone — non-neutral wording such as second-person instructions or emotional framing
+4. Attention-seeking wording — descriptions using exaggeration or marketing-style language (e.g. "better", "use this if...")
+5. Predicted precedence — for each overlapping tool group, predict which tool the LLM would likely select and explain why (e.g. due to tone, specificity, keyword match)
+6. Inconsistency in tone or structure — descriptions that don’t follow a consistent, formal, objective style
+
+The goal is to prevent the LLM from taking unintended or suboptimal actions due to description bias.
+Provide a structured and reasoned analysis, grouped by issue type. Include recommendations where appropriate.
+Pay attention to Predicted precedence, as it is crucial for understanding how the LLM might prioritize tools.
+Identitfy which tools are most likely to be selected based on the descriptions provided if they are similar in nature
+The analysis should be clear and concise, with a focus on the potential impact of each issue on the LLM's decision-making process.
+""").strip())
+
+
+# Appended to the user message when some tools were folded into another tool's entry
+_ALIASES_NOTE = "\n\nTools listed under \"aliases\" have exactly the same description as the tool they are listed under."
+
+
+def build_user_prompt(intro: str, tools: List[Dict[str, Any]], aliases: Dict[str, List[str]]) -> str:
+    """
+    Build the user message: an intro line followed by the (condensed) tool declarations.
+
+    Only this message varies between runs, the system prompt is a fixed constant.
+    """
+    user_prompt = intro + "\n\n" + orjson.dumps(tools, option=orjson.OPT_INDENT_2).decode("utf-8")
+    if aliases:
+        user_prompt += _ALIASES_NOTE
+    return user_prompt
+
+
+
+# Bump when the prompt changes in a way the fingerprinted text doesn't capture,
+# e.g. a different layout of the tool list
+REPORT_CACHE_VERSION = 1
+
+
+def prompt_fingerprint(*settings: str) -> bytes:
+    """
+    Digest of everything besides the tools that shapes a report, used to key the report cache.
+
+    Covers the cache version, the system prompt and the aliases note, plus the
+    reporter-specific settings passed in (user prompt intro, model, output schema).
+    Computed once at import, so per-run cache hashing only covers the tools.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    for part in (str(REPORT_CACHE_VERSION), SYSTEM_PROMPT, _ALIASES_NOTE, *settings):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+# === Define output structure ===
+class PredictedPrecedence(BaseModel):
+    tools: List[str]
+    likely_selection: str
+    reason: str
+    conflicting_tools: List[str]
+
+class OverlappingFunctionality(BaseModel):
+    description: str
+    predicted_precedence: List[PredictedPrecedence]
+
+class IssueCategory(BaseModel):
+    description: str
+    affected_tools: Optional[List[str]] = None
+
+class Recommendations(BaseModel):
+    suggestions: List[str]
+
+class StructuredAnalysis(BaseModel):
+    overlapping_functionality: OverlappingFunctionality
+    influencing_or_persuasive_language: IssueCategory
+    crafted_or_informal_tone: IssueCategory
+    attention_seeking_wording: IssueCategory
+    inconsistency_in_tone_or_structure: IssueCategory
+    recommendations: Recommendations
+
+
+# === Report every aliased tool wherever its representative is named ===
+def expand_analysis(analysis: StructuredAnalysis, aliases: Dict[str, List[str]]) -> StructuredAnalysis:
+    """Add the aliases collapsed by condense_tools after each tool named in the analysis."""
+    for precedence in analysis.overlapping_functionality.predicted_precedence:
+        precedence.tools = expand_aliases(precedence.tools, aliases)
+        precedence.conflicting_tools = expand_aliases(precedence.conflicting_tools, aliases)
+    for category in (
+        analysis.influencing_or_persuasive_language,
+        analysis.crafted_or_informal_tone,
+        analysis.attention_seeking_wording,
+        analysis.inconsistency_in_tone_or_structure,
+    ):
+        category.affected_tools = expand_aliases(category.affected_tools, aliases)
+    return analysis
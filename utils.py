@@ -0,0 +1,201 @@
+"""
+Shared helpers for the MCP Server Tool Analyzer scripts.
+"""
+# Copyright (c) 2025 kubiosec-ai
+#
+# This file is part of MCP Server Tool Analyzer.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import contextlib
+import hashlib
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+# Directory holding cached LLM reports
+REPORT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mcp-analyser"
+
+
+@contextlib.contextmanager
+def env_overlay(env: Dict[str, str]) -> Iterator[None]:
+    """
+    Temporarily apply environment variables to os.environ.
+
+    Only the overlaid keys are saved, so restoring costs one round-trip per
+    key instead of rebuilding the whole environment.
+
+    Args:
+        env: Environment variables to set for the duration of the block
+    """
+    original_env = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in original_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def report_cache_path(namespace: str, tools: List[Dict[str, Any]], fingerprint: bytes, suffix: str = ".json") -> Path:
+    """
+    Get the cache file for an LLM report on a list of tools.
+
+    The file name is derived from a BLAKE2b hash of the tools, keyed with the
+    reporter's fingerprint. Any change to a tool name or description, or to the
+    prompt or model behind the fingerprint, results in a new cache entry, while
+    reordering the tools does not.
+
+    Args:
+        namespace: Name of the reporter, keeps reports of different scripts apart
+        tools: Tool declarations sent to the LLM
+        fingerprint: Digest of the fixed prompt and model settings, computed once per process
+        suffix: File extension of the cached report
+
+    Returns:
+        Path of the cache file, which may not exist yet
+    """
+    # Sort the serialized tools so the key does not depend on list order,
+    # which follows server completion order in analyser.py output
+    blobs = sorted(orjson.dumps(tool, option=orjson.OPT_SORT_KEYS) for tool in tools)
+    key = hashlib.blake2b(b"\n".join(blobs), digest_size=16, key=fingerprint).hexdigest()
+    return REPORT_CACHE_DIR / f"{namespace}-{key}{suffix}"
+
+
+def read_report_cache(path: Path) -> Optional[str]:
+    """
+    Read a cached report.
+
+    Args:
+        path: Cache file returned by report_cache_path
+
+    Returns:
+        The cached report, or None if there is none or MCP_ANALYSER_NO_CACHE is set
+    """
+    if os.environ.get("MCP_ANALYSER_NO_CACHE"):
+        return None
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def write_report_cache(path: Path, report: str) -> None:
+    """
+    Atomically write a report to its cache file.
+
+    Args:
+        path: Cache file returned by report_cache_path
+        report: Report text to cache
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(report, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        # Caching is best effort, the report has already been produced
+        pass
+
+
+def condense_tools(tools: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """
+    Collapse tools with identical descriptions into a single entry.
+
+    Descriptions are compared case-insensitively after stripping whitespace. The
+    first tool of each group is kept and the other distinct names are listed in
+    its "aliases" field. Repeats of the kept tool's own name, as happens when
+    several servers export the same tool, are simply dropped. Entries that are
+    not dicts with a string name and a non-empty string description are never
+    grouped and are passed through unchanged.
+
+    Aliases are looked up by tool name, so a group is only collapsed when its
+    first tool's name is not also used by another entry in the list. Otherwise
+    the aliases of one group would be attached to every tool with that name.
+
+    Args:
+        tools: Tool declarations with "name" and "description" keys
+
+    Returns:
+        The condensed tool list and a mapping from each kept tool name to its aliases
+    """
+    # Group tools by description, remembering where each group first appears
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    entries: List[List[Any]] = []
+    for tool in tools:
+        key = ""
+        if isinstance(tool, dict) and isinstance(tool.get("name"), str) and isinstance(tool.get("description"), str):
+            key = tool["description"].strip().lower()
+        if not key:
+            entries.append([tool])
+        elif key in groups:
+            groups[key].append(tool)
+        else:
+            groups[key] = [tool]
+            entries.append(groups[key])
+
+    # Names of the tools that would represent each entry in the prompt
+    name_counts = Counter(_tool_name(members[0]) for members in entries)
+
+    condensed = []
+    aliases: Dict[str, List[str]] = {}
+    for members in entries:
+        name = _tool_name(members[0])
+        if len(members) == 1 or name_counts[name] > 1:
+            condensed.extend(members)
+            continue
+
+        # Distinct names other than the representative's, in order of appearance
+        names = list(dict.fromkeys(tool["name"] for tool in members[1:] if tool["name"] != name))
+        if names:
+            condensed.append({**members[0], "aliases": names})
+            aliases[name] = names
+        else:
+            condensed.append(members[0])
+
+    return condensed, aliases
+
+
+def _tool_name(tool: Any) -> Optional[str]:
+    """Get the name of a tool declaration, or None if it has no string name."""
+    if isinstance(tool, dict) and isinstance(tool.get("name"), str):
+        return tool["name"]
+    return None
+
+
+def expand_aliases(names: Optional[List[str]], aliases: Dict[str, List[str]]) -> Optional[List[str]]:
+    """
+    Add the aliases collapsed by condense_tools back after each tool name.
+
+    Args:
+        names: Tool names reported by the LLM
+        aliases: Mapping returned by condense_tools
+
+    Returns:
+        The tool names with their aliases, in order and without duplicates
+    """
+    if not names or not aliases:
+        return names
+    return list(dict.fromkeys(expanded for name in names for expanded in (name, *aliases.get(name, ()))))